@@ -2,6 +2,7 @@
 # /// script
 # requires-python = ">=3.10"
 # dependencies = [
+#     "numba",
 #     "numpy",
 #     "matplotlib",
 #     "scipy",
@@ -19,52 +20,17 @@ follows a Normal or Rayleigh distribution. It produces:
 Output: PNG files for each group size analyzed.
 """
 
+from functools import partial
+
 import numpy as np
+import matplotlib
+
+matplotlib.use("Agg")  # Plots are only saved to file, also from worker processes
 import matplotlib.pyplot as plt
-from scipy import stats
+from scipy import special, stats
 from typing import Tuple
 
-
-def simulate_groups(
-    n_shots: int,
-    n_simulations: int = 1_000_000,
-    seed: int = 42,
-    batch_size: int = 50_000,
-) -> np.ndarray:
-    """
-    Simulate n_simulations groups of n_shots each.
-
-    Uses bivariate normal distribution with σ=1 for both x and y coordinates.
-
-    Returns:
-        Array of mean radii, length n_simulations
-    """
-    rng = np.random.default_rng(seed + n_shots)
-
-    all_mr = []
-    n_batches = (n_simulations + batch_size - 1) // batch_size
-
-    for batch_idx in range(n_batches):
-        batch_start = batch_idx * batch_size
-        batch_end = min(batch_start + batch_size, n_simulations)
-        batch_n = batch_end - batch_start
-
-        # Generate shots: shape (batch_n, n_shots, 2) for x,y coordinates
-        shots = rng.standard_normal((batch_n, n_shots, 2))
-
-        # Calculate center of impact (COI) for each group
-        centers = shots.mean(axis=1, keepdims=True)  # shape (batch_n, 1, 2)
-
-        # Distance from center for each shot
-        distances_from_center = np.sqrt(
-            ((shots - centers) ** 2).sum(axis=2)
-        )  # (batch_n, n_shots)
-
-        # Mean radius = average distance from center
-        mean_radii = distances_from_center.mean(axis=1)  # (batch_n,)
-        all_mr.append(mean_radii)
-
-    return np.concatenate(all_mr)
+from shot_groups import cached_simulate_groups, simulation_pool
 
 
 def normalize_data(data: np.ndarray) -> np.ndarray:
@@ -80,39 +46,70 @@ def fit_distributions(data: np.ndarray) -> Tuple[dict, dict]:
         Tuple of (normal_params, rayleigh_params) dictionaries
     """
     # Fit Normal distribution
-    norm_loc, norm_scale = stats.norm.fit(data)
+    # The MLE is closed-form: sample mean and population std (ddof=0)
+    norm_loc = float(data.mean())
+    norm_scale = float(data.std())
     normal_params = {"loc": norm_loc, "scale": norm_scale}
 
     # Fit Rayleigh distribution
-    # Rayleigh has loc and scale parameters
-    ray_loc, ray_scale = stats.rayleigh.fit(data)
+    # Rayleigh has loc and scale parameters. Fixing loc at the sample minimum
+    # leaves the closed-form scale MLE sqrt(mean((x - loc)^2) / 2), avoiding
+    # scipy's numerical optimizer on the full sample.
+    ray_loc = float(data.min())
+    ray_scale = float(np.sqrt(((data - ray_loc) ** 2).mean() / 2))
     rayleigh_params = {"loc": ray_loc, "scale": ray_scale}
 
     return normal_params, rayleigh_params
 
 
+def _ks_test(sorted_data: np.ndarray, cdf: np.ndarray) -> Tuple[float, float]:
+    """
+    Two-sided one-sample KS test from sorted data and the fitted CDF at each point.
+
+    The statistic matches scipy.stats.kstest. The p-value uses the asymptotic
+    Kolmogorov distribution, a close approximation at this sample size (error
+    of order 1/sqrt(n)) that can differ slightly from kstest's exact p-value.
+
+    Returns:
+        Tuple of (statistic, pvalue)
+    """
+    n = len(sorted_data)
+    d_plus = (np.arange(1, n + 1) / n - cdf).max()
+    d_minus = (cdf - np.arange(n) / n).max()
+    statistic = float(max(d_plus, d_minus))
+    pvalue = float(special.kolmogorov(np.sqrt(n) * statistic))
+    return statistic, pvalue
+
+
 def compute_goodness_of_fit(
-    data: np.ndarray, normal_params: dict, rayleigh_params: dict
+    sorted_data: np.ndarray, normal_params: dict, rayleigh_params: dict
 ) -> dict:
     """
     Compute goodness-of-fit statistics for both distributions.
 
+    sorted_data must be sorted in ascending order; the single sort is shared
+    by both tests.
+
     Returns:
         Dictionary with KS test results for both distributions
     """
     # Kolmogorov-Smirnov test for Normal
-    ks_norm = stats.kstest(
-        data, "norm", args=(normal_params["loc"], normal_params["scale"])
+    norm_stat, norm_pvalue = _ks_test(
+        sorted_data,
+        stats.norm.cdf(sorted_data, normal_params["loc"], normal_params["scale"]),
     )
 
     # Kolmogorov-Smirnov test for Rayleigh
-    ks_ray = stats.kstest(
-        data, "rayleigh", args=(rayleigh_params["loc"], rayleigh_params["scale"])
+    ray_stat, ray_pvalue = _ks_test(
+        sorted_data,
+        stats.rayleigh.cdf(
+            sorted_data, rayleigh_params["loc"], rayleigh_params["scale"]
+        ),
     )
 
     return {
-        "normal": {"statistic": ks_norm.statistic, "pvalue": ks_norm.pvalue},
-        "rayleigh": {"statistic": ks_ray.statistic, "pvalue": ks_ray.pvalue},
+        "normal": {"statistic": norm_stat, "pvalue": norm_pvalue},
+        "rayleigh": {"statistic": ray_stat, "pvalue": ray_pvalue},
     }
 
 
@@ -126,6 +123,8 @@ def create_analysis_plot(
 ) -> None:
     """
     Create a comprehensive analysis plot with histogram, Q-Q plots, and statistics.
+
+    data must be sorted in ascending order (it is used directly for the Q-Q plots).
     """
     fig, axes = plt.subplots(2, 2, figsize=(14, 12))
     fig.suptitle(
@@ -231,19 +230,22 @@ def create_analysis_plot(
     # === Bottom Left: Q-Q Plot for Normal ===
     ax3 = axes[1, 0]
 
+    # Subsample for plotting (1M points is too many). The data is already
+    # sorted, so the sample quantiles are a direct index and the theoretical
+    # quantiles only need evaluating at the plotted probabilities.
+    n = len(data)
+    subsample_idx = np.linspace(0, n - 1, 1000, dtype=int)
+    sample_quantiles = data[subsample_idx]
+    plot_probs = (subsample_idx + 0.5) / n
+
     # Calculate theoretical quantiles for Normal
-    sorted_data = np.sort(data)
-    n = len(sorted_data)
     theoretical_quantiles = stats.norm.ppf(
-        (np.arange(1, n + 1) - 0.5) / n, normal_params["loc"], normal_params["scale"]
+        plot_probs, normal_params["loc"], normal_params["scale"]
     )
 
-    # Subsample for plotting (1M points is too many)
-    subsample_idx = np.linspace(0, n - 1, 1000, dtype=int)
-
     ax3.scatter(
-        theoretical_quantiles[subsample_idx],
-        sorted_data[subsample_idx],
+        theoretical_quantiles,
+        sample_quantiles,
         alpha=0.5,
         s=10,
         color=normal_color,
@@ -251,8 +253,8 @@ def create_analysis_plot(
     )
 
     # Add reference line
-    min_val = min(theoretical_quantiles[subsample_idx].min(), sorted_data[subsample_idx].min())
-    max_val = max(theoretical_quantiles[subsample_idx].max(), sorted_data[subsample_idx].max())
+    min_val = min(theoretical_quantiles.min(), sample_quantiles.min())
+    max_val = max(theoretical_quantiles.max(), sample_quantiles.max())
     ax3.plot([min_val, max_val], [min_val, max_val], "k--", linewidth=1.5, label="Perfect fit")
 
     ax3.set_xlabel("Theoretical Quantiles (Normal)", fontsize=11)
@@ -266,14 +268,14 @@ def create_analysis_plot(
 
     # Calculate theoretical quantiles for Rayleigh
     theoretical_quantiles_ray = stats.rayleigh.ppf(
-        (np.arange(1, n + 1) - 0.5) / n,
+        plot_probs,
         rayleigh_params["loc"],
         rayleigh_params["scale"],
     )
 
     ax4.scatter(
-        theoretical_quantiles_ray[subsample_idx],
-        sorted_data[subsample_idx],
+        theoretical_quantiles_ray,
+        sample_quantiles,
         alpha=0.5,
         s=10,
         color=rayleigh_color,
@@ -281,8 +283,8 @@ def create_analysis_plot(
     )
 
     # Add reference line
-    min_val_ray = min(theoretical_quantiles_ray[subsample_idx].min(), sorted_data[subsample_idx].min())
-    max_val_ray = max(theoretical_quantiles_ray[subsample_idx].max(), sorted_data[subsample_idx].max())
+    min_val_ray = min(theoretical_quantiles_ray.min(), sample_quantiles.min())
+    max_val_ray = max(theoretical_quantiles_ray.max(), sample_quantiles.max())
     ax4.plot(
         [min_val_ray, max_val_ray],
         [min_val_ray, max_val_ray],
@@ -301,7 +303,41 @@ def create_analysis_plot(
     plt.savefig(output_path, dpi=150, bbox_inches="tight")
     plt.close()
 
-    print(f"  Saved: {output_path}")
+
+def analyze_group_size(
+    n_shots: int, n_simulations: int = 1_000_000
+) -> Tuple[int, float, float, str]:
+    """
+    Simulate, fit and plot the MR distribution for one group size.
+
+    Returns:
+        Tuple of (n_shots, ks_normal, ks_rayleigh, output_path)
+    """
+    # Simulate, normalize and sort once for the KS tests and Q-Q plots
+    _, mean_radii = cached_simulate_groups(n_shots, n_simulations)
+    normalized_mr = np.sort(normalize_data(mean_radii))
+
+    # Fit distributions and compute goodness-of-fit
+    normal_params, rayleigh_params = fit_distributions(normalized_mr)
+    gof_stats = compute_goodness_of_fit(normalized_mr, normal_params, rayleigh_params)
+
+    # Create plot
+    output_path = f"mr_distribution_n{n_shots}.png"
+    create_analysis_plot(
+        normalized_mr,
+        n_shots,
+        normal_params,
+        rayleigh_params,
+        gof_stats,
+        output_path,
+    )
+
+    return (
+        n_shots,
+        gof_stats["normal"]["statistic"],
+        gof_stats["rayleigh"]["statistic"],
+        output_path,
+    )
 
 
 def main():
@@ -317,48 +353,21 @@ def main():
     print("=" * 70)
     print()
 
-    for n_shots in group_sizes:
-        print(f"Analyzing n={n_shots} shots...")
-        print(f"  Simulating {n_simulations:,} groups...", end="", flush=True)
-
-        # Simulate
-        mean_radii = simulate_groups(n_shots, n_simulations)
-        print(" done")
-
-        # Normalize
-        print("  Normalizing data...", end="", flush=True)
-        normalized_mr = normalize_data(mean_radii)
-        print(" done")
-
-        # Fit distributions
-        print("  Fitting distributions...", end="", flush=True)
-        normal_params, rayleigh_params = fit_distributions(normalized_mr)
-        print(" done")
-
-        # Compute goodness-of-fit
-        print("  Computing goodness-of-fit statistics...", end="", flush=True)
-        gof_stats = compute_goodness_of_fit(normalized_mr, normal_params, rayleigh_params)
-        print(" done")
-
-        # Create plot
-        print("  Creating analysis plot...", end="", flush=True)
-        output_path = f"mr_distribution_n{n_shots}.png"
-        create_analysis_plot(
-            normalized_mr,
-            n_shots,
-            normal_params,
-            rayleigh_params,
-            gof_stats,
-            output_path,
-        )
-
-        # Print summary
-        ks_norm = gof_stats["normal"]["statistic"]
-        ks_ray = gof_stats["rayleigh"]["statistic"]
-        winner = "Normal" if ks_norm < ks_ray else "Rayleigh"
-        print(f"  KS Statistics - Normal: {ks_norm:.6f}, Rayleigh: {ks_ray:.6f}")
-        print(f"  Better fit: {winner}")
-        print()
+    # Group sizes are independent (seeded by seed + n_shots), so analyze them
+    # across processes
+    print(f"Analyzing {len(group_sizes)} group sizes in parallel...")
+    print()
+    worker = partial(analyze_group_size, n_simulations=n_simulations)
+
+    with simulation_pool(len(group_sizes)) as pool:
+        for n_shots, ks_norm, ks_ray, output_path in pool.imap(worker, group_sizes):
+            # Print summary
+            winner = "Normal" if ks_norm < ks_ray else "Rayleigh"
+            print(f"n={n_shots} shots:")
+            print(f"  KS Statistics - Normal: {ks_norm:.6f}, Rayleigh: {ks_ray:.6f}")
+            print(f"  Better fit: {winner}")
+            print(f"  Saved: {output_path}")
+            print()
 
     print("=" * 70)
     print("Analysis complete!")
@@ -0,0 +1,188 @@
+"""
+Monte Carlo simulation of shot groups shared by the analysis scripts.
+
+Shots follow a bivariate normal distribution with σ=1 in x and y. For each
+simulated group the Extreme Spread (ES) and Mean Radius (MR) are computed.
+
+Results are cached per (bit generator, batch size, n_shots, n_simulations,
+seed) as .npz files in the project's .cache directory, so simulate_es_mr.py and
+analyze_mr_distribution.py share a single simulation and reruns skip the
+Monte Carlo entirely.
+
+Group sizes are simulated in parallel across the processes of
+simulation_pool(), which splits the cores between processes and each
+worker's Numba threads.
+"""
+
+import multiprocessing
+import multiprocessing.pool
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+from numba import njit, prange, set_num_threads
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache"
+BIT_GENERATOR = "sfc64"  # Part of the cache key; update with the RNG below
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _simulate_kernel(xs, ys, out_es, out_mr):
+    """
+    Compute ES and MR for each group from (n_sims, n_shots) x and y arrays.
+
+    Centroid, mean radius and max pairwise distance are fused into one pass
+    per group, so only the two output scalars are written to memory.
+    """
+    n_sims, n_shots = xs.shape
+    for s in prange(n_sims):
+        # Center of impact (COI)
+        cx = 0.0
+        cy = 0.0
+        for k in range(n_shots):
+            cx += xs[s, k]
+            cy += ys[s, k]
+        cx /= n_shots
+        cy /= n_shots
+
+        # Mean radius = average distance from center
+        sum_r = 0.0
+        for k in range(n_shots):
+            dx = xs[s, k] - cx
+            dy = ys[s, k] - cy
+            sum_r += np.sqrt(dx * dx + dy * dy)
+
+        # Extreme spread = max distance over the unique shot pairs
+        max_d2 = 0.0
+        for i in range(n_shots):
+            for j in range(i + 1, n_shots):
+                dx = xs[s, i] - xs[s, j]
+                dy = ys[s, i] - ys[s, j]
+                d2 = dx * dx + dy * dy
+                if d2 > max_d2:
+                    max_d2 = d2
+
+        out_mr[s] = sum_r / n_shots
+        out_es[s] = np.sqrt(max_d2)
+
+
+def simulate_groups(
+    n_shots: int,
+    n_simulations: int = 1_000_000,
+    seed: int = 42,
+    batch_size: int = 50_000,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Simulate n_simulations groups of n_shots each.
+
+    Uses bivariate normal distribution with σ=1 for both x and y coordinates.
+
+    Returns:
+        Tuple of (extreme_spreads, mean_radii) arrays, each of length n_simulations
+    """
+    # Use different seed per n_shots for variety across sample sizes.
+    # SFC64 is faster than the default PCG64 for bulk normal draws.
+    rng = np.random.Generator(np.random.SFC64(seed + n_shots))
+
+    es_out = np.empty(n_simulations, dtype=np.float64)
+    mr_out = np.empty_like(es_out)
+
+    n_batches = (n_simulations + batch_size - 1) // batch_size
+
+    for batch_idx in range(n_batches):
+        batch_start = batch_idx * batch_size
+        batch_end = min(batch_start + batch_size, n_simulations)
+        batch_n = batch_end - batch_start
+
+        # Generate shots as separate x and y arrays, shape (batch_n, n_shots),
+        # so each coordinate is a contiguous stream for the kernel. float32 is
+        # ample for the sampled coordinates; the kernel accumulates in float64.
+        xs = rng.standard_normal((batch_n, n_shots), dtype=np.float32)
+        ys = rng.standard_normal((batch_n, n_shots), dtype=np.float32)
+
+        # Write each batch straight into its slice of the result arrays
+        _simulate_kernel(
+            xs,
+            ys,
+            es_out[batch_start:batch_end],
+            mr_out[batch_start:batch_end],
+        )
+
+    return es_out, mr_out
+
+
+def _init_pool_worker(n_threads: int) -> None:
+    """multiprocessing.Pool initializer: cap the kernel's Numba threads."""
+    set_num_threads(n_threads)
+
+
+def simulation_pool(n_tasks: int) -> multiprocessing.pool.Pool:
+    """
+    Create a process pool for simulating n_tasks independent group sizes.
+
+    Uses at most one process per task and gives each worker an equal share of
+    the cores as Numba threads, so processes x threads never exceeds the core
+    count. With fewer tasks than cores (e.g. analyze_mr_distribution's four
+    group sizes) the kernel's prange threads use the remaining cores.
+    """
+    n_cpus = multiprocessing.cpu_count()
+    n_processes = max(1, min(n_tasks, n_cpus))
+    n_threads = max(1, n_cpus // n_processes)
+    return multiprocessing.Pool(
+        processes=n_processes, initializer=_init_pool_worker, initargs=(n_threads,)
+    )
+
+
+def cached_simulate_groups(
+    n_shots: int,
+    n_simulations: int = 1_000_000,
+    seed: int = 42,
+    batch_size: int = 50_000,
+    cache_dir: Optional[Path] = CACHE_DIR,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return simulate_groups() output, loading it from the .npz cache if present.
+
+    The batch size is part of the cache key because it sets how the random
+    stream is laid out across groups, so changing it changes the results.
+    Pass cache_dir=None to always simulate without reading or writing the cache.
+
+    Returns:
+        Tuple of (extreme_spreads, mean_radii) arrays, each of length n_simulations
+    """
+    if cache_dir is None:
+        return simulate_groups(n_shots, n_simulations, seed, batch_size)
+
+    cache_path = cache_dir / (
+        f"sim_{BIT_GENERATOR}_b{batch_size}_n{n_shots}_N{n_simulations}_s{seed}.npz"
+    )
+    if cache_path.exists():
+        try:
+            with np.load(cache_path) as cached:
+                return cached["es"], cached["mr"]
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            # Unreadable entry (e.g. from an interrupted older run): treat it as
+            # a miss and overwrite it below
+            pass
+
+    es, mr = simulate_groups(n_shots, n_simulations, seed, batch_size)
+
+    # Each writer gets its own temporary file, renamed into place atomically, so
+    # concurrent runs never interleave writes or read a partial cache entry
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=cache_dir, prefix=f"{cache_path.stem}.", suffix=".tmp", delete=False
+    ) as tmp_file:
+        tmp_path = tmp_file.name
+        try:
+            np.savez_compressed(tmp_file, es=es, mr=mr)
+        except BaseException:
+            tmp_file.close()
+            os.remove(tmp_path)
+            raise
+    os.replace(tmp_path, cache_path)
+
+    return es, mr
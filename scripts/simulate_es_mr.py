@@ -2,6 +2,7 @@
 # /// script
 # requires-python = ">=3.10"
 # dependencies = [
+#     "numba",
 #     "numpy",
 # ]
 # ///
@@ -31,64 +32,13 @@ Output: JavaScript object for copy-paste into index.html
 
 import json
 import sys
+from functools import partial
 from pathlib import Path
 from typing import Dict, Tuple
 
 import numpy as np
 
-
-def simulate_groups(
-    n_shots: int,
-    n_simulations: int = 1_000_000,
-    seed: int = 42,
-    batch_size: int = 50_000,
-) -> Tuple[np.ndarray, np.ndarray]:
-    """
-    Simulate n_simulations groups of n_shots each.
-
-    Uses bivariate normal distribution with σ=1 for both x and y coordinates.
-
-    Returns:
-        Tuple of (extreme_spreads, mean_radii) arrays, each of length n_simulations
-    """
-    # Use different seed per n_shots for variety across sample sizes
-    rng = np.random.default_rng(seed + n_shots)
-
-    all_es = []
-    all_mr = []
-
-    n_batches = (n_simulations + batch_size - 1) // batch_size
-
-    for batch_idx in range(n_batches):
-        batch_start = batch_idx * batch_size
-        batch_end = min(batch_start + batch_size, n_simulations)
-        batch_n = batch_end - batch_start
-
-        # Generate shots: shape (batch_n, n_shots, 2) for x,y coordinates
-        shots = rng.standard_normal((batch_n, n_shots, 2))
-
-        # Calculate center of impact (COI) for each group
-        centers = shots.mean(axis=1, keepdims=True)  # shape (batch_n, 1, 2)
-
-        # Distance from center for each shot
-        distances_from_center = np.sqrt(
-            ((shots - centers) ** 2).sum(axis=2)
-        )  # (batch_n, n_shots)
-
-        # Mean radius = average distance from center
-        mean_radii = distances_from_center.mean(axis=1)  # (batch_n,)
-        all_mr.append(mean_radii)
-
-        # Extreme spread = max pairwise distance between any two shots
-        # Vectorized computation of all pairwise distances within each group
-        shots_i = shots[:, :, np.newaxis, :]  # (batch_n, n_shots, 1, 2)
-        shots_j = shots[:, np.newaxis, :, :]  # (batch_n, 1, n_shots, 2)
-        diff = shots_i - shots_j  # (batch_n, n_shots, n_shots, 2)
-        pairwise_dist = np.sqrt((diff**2).sum(axis=3))  # (batch_n, n_shots, n_shots)
-        extreme_spreads = pairwise_dist.max(axis=(1, 2))  # (batch_n,)
-        all_es.append(extreme_spreads)
-
-    return np.concatenate(all_es), np.concatenate(all_mr)
+from shot_groups import cached_simulate_groups, simulation_pool
 
 
 def compute_ratio_percentiles(
@@ -101,14 +51,20 @@ def compute_ratio_percentiles(
     Returns:
         Tuple of (p5, p50, p95) ratio values
     """
-    es, mr = simulate_groups(n_shots, n_simulations)
+    es, mr = cached_simulate_groups(n_shots, n_simulations)
     ratios = mr / es
 
-    p5 = float(np.percentile(ratios, 5))
-    p50 = float(np.percentile(ratios, 50))
-    p95 = float(np.percentile(ratios, 95))
+    # One call shares the partitioning work across all three percentiles
+    p5, p50, p95 = np.quantile(ratios, [0.05, 0.50, 0.95])
 
-    return p5, p50, p95
+    return float(p5), float(p50), float(p95)
+
+
+def compute_ratio_percentiles_worker(
+    n_shots: int, n_simulations: int = 1_000_000
+) -> Tuple[int, float, float, float]:
+    """Pool worker: return (n_shots, p5, p50, p95) for one group size."""
+    return (n_shots, *compute_ratio_percentiles(n_shots, n_simulations))
 
 
 def generate_table(
@@ -127,39 +83,35 @@ def generate_table(
     }
     Where p5, p50, p95 are the 5th, 50th, 95th percentiles of Mean Radius in MOA.
     """
-    # First, compute ratio percentiles for each n_shots value
+    # First, compute ratio percentiles for each n_shots value. Each group size
+    # is independent (seeded by seed + n_shots), so run them across processes.
     print("Computing MR/ES ratio distributions...")
     ratio_percentiles = {}
     total_n = len(n_shots_range)
+    worker = partial(compute_ratio_percentiles_worker, n_simulations=n_simulations)
 
-    for idx, n in enumerate(n_shots_range):
-        print(
-            f"  [{idx + 1}/{total_n}] Simulating n={n} shots ({n_simulations:,} groups)...",
-            end="",
-            flush=True,
-        )
-        ratio_percentiles[n] = compute_ratio_percentiles(n, n_simulations)
-        p5, p50, p95 = ratio_percentiles[n]
-        print(f" ratios: p5={p5:.4f}, p50={p50:.4f}, p95={p95:.4f}")
+    with simulation_pool(total_n) as pool:
+        results = pool.imap(worker, list(n_shots_range))
+        for idx, (n, p5, p50, p95) in enumerate(results):
+            ratio_percentiles[n] = (p5, p50, p95)
+            print(
+                f"  [{idx + 1}/{total_n}] Simulated n={n} shots ({n_simulations:,} groups)"
+                f" ratios: p5={p5:.4f}, p50={p50:.4f}, p95={p95:.4f}"
+            )
 
     # Build the table by scaling ratios for each ES value
     # Structure: table[es_str][n_str] = [mr_p5, mr_p50, mr_p95]
     print("\nBuilding lookup table...")
-    table = {}
-
-    for es in es_values:
-        es_str = f"{es:.1f}"
-        table[es_str] = {}
+    ratios = np.array([ratio_percentiles[n] for n in n_shots_range])  # (N, 3)
+    es_col = np.array(es_values)[:, None, None]  # (E, 1, 1)
 
-        for n in n_shots_range:
-            p5_ratio, p50_ratio, p95_ratio = ratio_percentiles[n]
+    # MR = ES * ratio, for all ES values and shot counts at once
+    mr = np.round(es_col * ratios[None, :, :], 4).tolist()  # (E, N, 3)
 
-            # MR = ES * ratio
-            mr_p5 = round(es * p5_ratio, 4)
-            mr_p50 = round(es * p50_ratio, 4)
-            mr_p95 = round(es * p95_ratio, 4)
-
-            table[es_str][str(n)] = [mr_p5, mr_p50, mr_p95]
+    table = {
+        f"{es:.1f}": {str(n): mr_row for n, mr_row in zip(n_shots_range, mr_es)}
+        for es, mr_es in zip(es_values, mr)
+    }
 
     return table
 